@@ -0,0 +1,113 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, initializedcheck=False
+# ==============================================================================
+# Native block processor for Aurelius live enhancement.
+#
+# Runs one overlap-save step (FFTW r2c -> multiply -> FFTW c2r -> clip) in a
+# single C call, with no Python or NumPy dispatch between the stages. Build it
+# with 'python aurelius.py build' (pyximport, see _aurelius_dsp.pyxbld); it needs
+# the single-precision FFTW library (libfftw3f) and its headers.
+# ==============================================================================
+
+from libc.string cimport memcpy, memmove, memset
+
+cdef extern from "fftw3.h":
+    ctypedef float fftwf_complex[2]
+    ctypedef struct fftwf_plan_s:
+        pass
+    ctypedef fftwf_plan_s *fftwf_plan
+    unsigned FFTW_MEASURE
+    unsigned FFTW_DESTROY_INPUT
+    fftwf_plan fftwf_plan_dft_r2c_1d(int n, float *inp, fftwf_complex *out, unsigned flags)
+    fftwf_plan fftwf_plan_dft_c2r_1d(int n, fftwf_complex *inp, float *out, unsigned flags)
+    void fftwf_execute(const fftwf_plan p) nogil
+    void fftwf_destroy_plan(fftwf_plan p)
+    void *fftwf_malloc(size_t n)
+    void fftwf_free(void *p)
+
+cdef extern from "_aurelius_simd.h":
+    void aurelius_clip_copy(const float *src, float *dst, int n) nogil
+
+
+cdef class BlockProcessor:
+    """Overlap-save FIR filter over FFTW plans that are built once and reused every block."""
+    cdef int fft_len, history, delay, block_size, n_bins
+    cdef float *frame
+    cdef float *filtered
+    cdef fftwf_complex *spectrum
+    cdef float *gain_pairs
+    cdef fftwf_plan fwd
+    cdef fftwf_plan bwd
+
+    def __cinit__(self, const float[::1] gain_pairs, int fft_len, int history, int delay, int block_size):
+        """gain_pairs is the filter's real zero-phase response, each gain repeated for the
+        real and imaginary part of a bin; delay is where the filtered block is read from."""
+        if history + block_size > fft_len or gain_pairs.shape[0] != 2 * (fft_len // 2 + 1):
+            raise ValueError("gains and frame sizes do not match fft_len")
+        self.fft_len = fft_len
+        self.history = history
+        self.delay = delay
+        self.block_size = block_size
+        self.n_bins = fft_len // 2 + 1
+
+        # fftwf_malloc aligns the buffers for FFTW's SIMD codelets
+        self.frame = <float *>fftwf_malloc(fft_len * sizeof(float))
+        self.filtered = <float *>fftwf_malloc(fft_len * sizeof(float))
+        self.spectrum = <fftwf_complex *>fftwf_malloc(self.n_bins * sizeof(fftwf_complex))
+        self.gain_pairs = <float *>fftwf_malloc(2 * self.n_bins * sizeof(float))
+        if not (self.frame and self.filtered and self.spectrum and self.gain_pairs):
+            raise MemoryError()
+
+        # FFTW_MEASURE overwrites the buffers while planning, so fill them afterwards.
+        # The forward plan preserves its input (the frame also holds the history).
+        self.fwd = fftwf_plan_dft_r2c_1d(fft_len, self.frame, self.spectrum, FFTW_MEASURE)
+        self.bwd = fftwf_plan_dft_c2r_1d(fft_len, self.spectrum, self.filtered,
+                                         FFTW_MEASURE | FFTW_DESTROY_INPUT)
+        if self.fwd == NULL or self.bwd == NULL:
+            raise RuntimeError("FFTW could not create a plan")
+        memset(self.frame, 0, fft_len * sizeof(float))
+
+        # FFTW's inverse transform is unnormalised; fold the 1/N into the gains
+        cdef int i
+        cdef float scale = 1.0 / fft_len
+        for i in range(2 * self.n_bins):
+            self.gain_pairs[i] = gain_pairs[i] * scale
+
+    def __dealloc__(self):
+        if self.fwd != NULL:
+            fftwf_destroy_plan(self.fwd)
+        if self.bwd != NULL:
+            fftwf_destroy_plan(self.bwd)
+        fftwf_free(self.frame)
+        fftwf_free(self.filtered)
+        fftwf_free(self.spectrum)
+        fftwf_free(self.gain_pairs)
+
+    def process(self, const float[::1] block, float[::1] out):
+        """Filters one block (at most block_size samples) and writes it, clipped, into out."""
+        cdef int n = block.shape[0]
+        if n > self.block_size or out.shape[0] < n:
+            raise ValueError("block does not fit the processor")
+        if n == 0:
+            return
+
+        cdef int i
+        cdef float *spectrum = <float *>self.spectrum
+        cdef const float *src = &block[0]
+        cdef float *dst = &out[0]
+        with nogil:
+            memcpy(self.frame + self.history, src, n * sizeof(float))
+            if n < self.block_size:
+                memset(self.frame + self.history + n, 0, (self.block_size - n) * sizeof(float))
+
+            fftwf_execute(self.fwd)
+            # Real gains on interleaved (re, im) floats: a plain float32 multiply
+            for i in range(2 * self.n_bins):
+                spectrum[i] *= self.gain_pairs[i]
+            fftwf_execute(self.bwd)
+
+            # Only `delay` .. `delay + n` is free of circular wrap-around;
+            # the clip doubles as the store of that region into out
+            aurelius_clip_copy(self.filtered + self.delay, dst, n)
+
+            # Keep the newest `history` samples at the front for the next block
+            memmove(self.frame, self.frame + n, self.history * sizeof(float))
@@ -0,0 +1,41 @@
+/* Branchless SIMD helpers for _aurelius_dsp.pyx. */
+#ifndef AURELIUS_SIMD_H
+#define AURELIUS_SIMD_H
+
+#if defined(__AVX__)
+#include <immintrin.h>
+#elif defined(__ARM_NEON)
+#include <arm_neon.h>
+#endif
+
+/* Copies n samples from src to dst, limiting each to [-1, 1]. AVX handles 8 lanes
+ * and NEON 4 lanes per min/max pair; the scalar loop finishes the tail. */
+static inline void aurelius_clip_copy(const float *src, float *dst, int n)
+{
+    int i = 0;
+#if defined(__AVX__)
+    const __m256 one = _mm256_set1_ps(1.0f);
+    const __m256 minus_one = _mm256_set1_ps(-1.0f);
+    for (; i + 8 <= n; i += 8) {
+        __m256 v = _mm256_loadu_ps(src + i);
+        v = _mm256_min_ps(v, one);
+        v = _mm256_max_ps(v, minus_one);
+        _mm256_storeu_ps(dst + i, v);
+    }
+#elif defined(__ARM_NEON)
+    const float32x4_t one = vdupq_n_f32(1.0f);
+    const float32x4_t minus_one = vdupq_n_f32(-1.0f);
+    for (; i + 4 <= n; i += 4) {
+        float32x4_t v = vld1q_f32(src + i);
+        v = vminq_f32(v, one);
+        v = vmaxq_f32(v, minus_one);
+        vst1q_f32(dst + i, v);
+    }
+#endif
+    for (; i < n; i++) {
+        float v = src[i];
+        dst[i] = v > 1.0f ? 1.0f : (v < -1.0f ? -1.0f : v);
+    }
+}
+
+#endif /* AURELIUS_SIMD_H */
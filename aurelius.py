@@ -14,43 +14,381 @@ import sounddevice as sd
 import json
 import os
 import argparse
-from scipy.fft import rfft, irfft
+import hashlib
+import math
+import threading
+from collections import namedtuple
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.signal import firwin2
+from scipy.ndimage import gaussian_filter1d
+
+try:
+    import pyfftw  # Optional: prebuilt FFTW plans for the live callback
+except ImportError:
+    pyfftw = None
+
+try:
+    import _aurelius_dsp  # Optional: native FFTW block processor, built with 'python aurelius.py build'
+except ImportError:
+    _aurelius_dsp = None
+
+try:
+    from numba import njit, prange  # Optional: compiled kernels for DSP and tone generation
+except ImportError:
+    njit = None
+
+try:
+    import cupy as cp  # Optional: CUDA FFTs for '--device gpu'
+    import cupyx
+except ImportError:
+    cp = None
 
 # --- 1. CORE CONFIGURATION ---
 PROFILE_NAME = "aurelius_profile.json"
+RESPONSE_CACHE_NAME = "aurelius_cache.json"  # Meta-Mind replies worth reusing across runs
 HEARING_TEST_FREQUENCIES = [250, 500, 1000, 2000, 4000, 6000, 8000] # Standard audiogram frequencies in Hz
 SAMPLE_RATE = 44100  # Standard audio sample rate
 TONE_DURATION = 1.0    # Seconds
-BLOCK_SIZE = 1024      # Audio processing chunk size (affects latency)
+# Audio processing chunk size. Larger blocks cost fewer FFTs per second but add
+# latency (BLOCK_SIZE / SAMPLE_RATE per block, ~23 ms at 1024). It needn't be a
+# power of two: the FFT length is padded separately to a fast 2/3/5-smooth size.
+BLOCK_SIZE = 1024
+FFT_WORKERS = 2        # Threads pocketfft may use per transform in the live callback
+FIR_TAPS = 511         # Length of the enhancement filter (odd, so it has a centre tap)
+RING_BLOCKS = 32       # Blocks of slack between the audio callback and the DSP thread
+
+# Test amplitudes from very quiet to loud (logarithmic scale), shared by every frequency
+CALIBRATION_LEVELS_DB = np.arange(-60, 1, 5)
+CALIBRATION_AMPLITUDES = (10**(CALIBRATION_LEVELS_DB / 20.0)).astype(np.float32)
+
+class Profile(namedtuple('Profile', ['freqs', 'gains_db'])):
+    """The Personal Audio Profile: the gain in dB needed at each test frequency, kept as
+    float32 arrays sorted by frequency. JSON is used only on disk and in LLM prompts."""
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, path=PROFILE_NAME):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        # Sort by frequency so nothing downstream depends on the key order in the file
+        items = sorted(data.items(), key=lambda kv: float(kv[0]))
+        freqs = np.fromiter((float(k) for k, _ in items), dtype=np.float32, count=len(items))
+        gains_db = np.fromiter((v for _, v in items), dtype=np.float32, count=len(items))
+        return cls(freqs, gains_db)
+
+    def to_dict(self):
+        return dict(zip((f"{freq:g}" for freq in self.freqs.tolist()), self.gains_db.tolist()))
+
+    def to_json(self, path=PROFILE_NAME):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
 
 # --- 2. THE META-MIND (LLM for Guidance) ---
 class MetaMind:
     def __init__(self, model_name="llama3"):
         self.model_name = model_name
+        try:
+            with open(RESPONSE_CACHE_NAME, 'r') as f:
+                self._cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._cache = {}
         print(f"Aurelius Meta-Mind initialized with model: '{self.model_name}'.")
 
-    def get_response(self, system_prompt, user_prompt):
+    def get_response(self, system_prompt, user_prompt, stream=False, cache=False):
+        """Asks the model for a reply. With stream=True the reply is printed as it arrives;
+        with cache=True it is stored on disk and reused on later runs."""
+        key = hashlib.sha256(json.dumps([self.model_name, system_prompt, user_prompt]).encode()).hexdigest()
+        if cache and key in self._cache:
+            if stream:
+                print(self._cache[key])
+            return self._cache[key]
+
+        messages = [{'role': 'system', 'content': system_prompt}, {'role': 'user', 'content': user_prompt}]
         try:
-            response = ollama.chat(model=self.model_name, messages=[
-                {'role': 'system', 'content': system_prompt}, {'role': 'user', 'content': user_prompt}
-            ])
-            return response['message']['content']
+            if stream:
+                parts = []
+                for chunk in ollama.chat(model=self.model_name, messages=messages, stream=True):
+                    parts.append(chunk['message']['content'])
+                    print(parts[-1], end='', flush=True)
+                print()
+                content = ''.join(parts)
+            else:
+                content = ollama.chat(model=self.model_name, messages=messages)['message']['content']
         except Exception as e:
-            return f"Error contacting Meta-Mind: {e}. Is Ollama running?"
+            content = f"Error contacting Meta-Mind: {e}. Is Ollama running?"
+            if stream:
+                print(content)
+            return content
 
-    def guide_calibration_start(self):
+        if cache:
+            self._cache[key] = content
+            with open(RESPONSE_CACHE_NAME, 'w') as f:
+                json.dump(self._cache, f, indent=2)
+        return content
+
+    def guide_calibration_start(self, stream=False):
         return self.get_response(
             "You are Aurelius, a friendly and professional AI audiologist. Your goal is to guide the user through a hearing test. Be encouraging and clear.",
-            "Please provide a welcoming message to the user, explaining that we are about to start a calibration test to create their personal hearing profile. Explain that they will hear a series of tones and should respond with 'y' (yes) if they can hear it, and 'n' (no) if they cannot. Advise them to be in a quiet room and use their earbuds."
+            "Please provide a welcoming message to the user, explaining that we are about to start a calibration test to create their personal hearing profile. Explain that they will hear a series of tones and should respond with 'y' (yes) if they can hear it, and 'n' (no) if they cannot. Advise them to be in a quiet room and use their earbuds.",
+            stream=stream, cache=True
         )
 
-    def explain_results(self, profile):
+    def explain_results(self, profile, stream=False):
         return self.get_response(
             "You are Aurelius, an AI audiologist. Your goal is to explain the user's hearing profile results in a simple, easy-to-understand way. Do not give medical advice.",
-            f"Here is the user's generated hearing profile, showing the required gain (amplification) in decibels (dB) for different frequencies: {json.dumps(profile)}. Please explain what this means. For example, a high dB gain at 4000Hz means they have difficulty hearing high-pitched sounds. Conclude by telling them the profile is saved and ready to be used in 'run' mode."
+            f"Here is the user's generated hearing profile, showing the required gain (amplification) in decibels (dB) for different frequencies: {json.dumps(profile.to_dict())}. Please explain what this means. For example, a high dB gain at 4000Hz means they have difficulty hearing high-pitched sounds. Conclude by telling them the profile is saved and ready to be used in 'run' mode.",
+            stream=stream
         )
 
 # --- 3. THE CALIBRATION & LIVE ENHANCEMENT ENGINES ---
+if njit is not None:
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _multiply_inplace(values, gains):
+        for i in range(values.size):
+            values[i] = values[i] * gains[i]
+
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _clip_into(samples, out):
+        # Copy and limit to full scale in a single pass
+        for i in range(samples.size):
+            v = samples[i]
+            if v > 1.0:
+                v = 1.0
+            elif v < -1.0:
+                v = -1.0
+            out[i] = v
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _generate_tone(freq, amplitude, sample_rate, out):
+        phase_step = 2 * np.pi * freq / sample_rate
+        for i in prange(out.shape[0]):
+            out[i] = np.sin(phase_step * i) * amplitude
+else:
+    def _multiply_inplace(values, gains):
+        np.multiply(values, gains, out=values)
+
+    def _clip_into(samples, out):
+        np.clip(samples, -1.0, 1.0, out=out)
+
+    def _generate_tone(freq, amplitude, sample_rate, out):
+        np.multiply(np.sin(np.arange(out.shape[0]) * (2 * np.pi * freq / sample_rate)), amplitude, out=out)
+
+def _warm_up_kernels():
+    """Compiles the DSP kernels ahead of time so the first audio block doesn't pay for it."""
+    _multiply_inplace(np.zeros(2, dtype=np.float32), np.ones(2, dtype=np.float32))
+    _clip_into(np.zeros(1, dtype=np.float32), np.empty(1, dtype=np.float32))
+
+def _empty_aligned(size, dtype, alignment=64):
+    """Returns an uninitialised 1-D array whose data starts on an `alignment`-byte boundary."""
+    itemsize = np.dtype(dtype).itemsize
+    raw = np.empty(size * itemsize + alignment, dtype=np.uint8)
+    offset = -raw.ctypes.data % alignment
+    return raw[offset:offset + size * itemsize].view(dtype)
+
+def _zero_phase_gain_pairs(taps, fft_len):
+    """Returns the real frequency response of a linear-phase FIR with its delay removed,
+    each gain repeated for the real and imaginary part of an interleaved complex64 spectrum.
+
+    A symmetric, odd-length filter is a zero-phase filter delayed by (taps - 1) / 2
+    samples. Rotating the centre tap to index 0 leaves a purely real spectrum, so the
+    per-block multiply becomes float32-by-float32 and the delay is applied instead by
+    where the filtered block is read from.
+    """
+    taps = np.asarray(taps, dtype=np.float64)
+    if len(taps) % 2 == 0 or not np.allclose(taps, taps[::-1]):
+        raise ValueError("taps must describe a symmetric, odd-length (linear-phase) filter")
+    delay = (len(taps) - 1) // 2
+    centred = np.roll(np.pad(taps, (0, fft_len - len(taps))), -delay)
+    gains = np.fft.rfft(centred).real
+    pairs = _empty_aligned(2 * len(gains), np.float32)
+    pairs[0::2] = gains
+    pairs[1::2] = gains
+    return pairs
+
+class _OverlapSaveFrame:
+    """Frame geometry and gains shared by the CPU and GPU overlap-save filters."""
+    def __init__(self, taps, block_size):
+        self.block_size = block_size
+        self.history = len(taps) - 1
+        # One FFT frame holds the previous (taps - 1) input samples plus a new block,
+        # padded up to a length pocketfft handles quickly.
+        self.fft_len = next_fast_len(block_size + self.history, real=True)
+        # Output of the zero-phase filter lags the linear-phase one by `delay` samples
+        self.delay = self.history // 2
+        self.gain_pairs = _zero_phase_gain_pairs(taps, self.fft_len)
+
+class OverlapSaveFilter(_OverlapSaveFrame):
+    """Streams audio blocks through a fixed FIR filter using overlap-save FFT convolution."""
+    def __init__(self, taps, block_size=BLOCK_SIZE):
+        super().__init__(taps, block_size)
+        self._native = None
+        self._fft = None
+        # The FFT input holds the frame; anything past the frame stays zero as padding.
+        if _aurelius_dsp is not None:
+            # One C call per block runs FFTW, the multiply and the clip back to back
+            self._native = _aurelius_dsp.BlockProcessor(self.gain_pairs, self.fft_len, self.history, self.delay, block_size)
+        elif pyfftw is not None:
+            # Plan once with FFTW_MEASURE on aligned buffers and reuse them every block.
+            # Planning scribbles over the arrays, so they are cleared afterwards.
+            self._fft_in = pyfftw.empty_aligned(self.fft_len, dtype='float32')
+            self._spectrum = pyfftw.empty_aligned(self.fft_len // 2 + 1, dtype='complex64')
+            self._fft_out = pyfftw.empty_aligned(self.fft_len, dtype='float32')
+            # The forward plan must preserve its input: it still holds the history.
+            self._fft = pyfftw.FFTW(self._fft_in, self._spectrum,
+                                    flags=('FFTW_MEASURE',), threads=FFT_WORKERS)
+            self._ifft = pyfftw.FFTW(self._spectrum, self._fft_out, direction='FFTW_BACKWARD',
+                                     flags=('FFTW_MEASURE', 'FFTW_DESTROY_INPUT'), threads=FFT_WORKERS)
+            self._fft_in[:] = 0
+        else:
+            self._fft_in = _empty_aligned(self.fft_len, np.float32)
+            self._fft_in[:] = 0
+        self._tail = np.empty(self.history, dtype=np.float32)
+
+    def process(self, block, out):
+        """Filters one block (at most block_size samples) and writes it, clipped to full scale, into out."""
+        if self._native is not None:
+            self._native.process(block, out)
+            return
+        n = len(block)
+        np.copyto(self._fft_in[self.history:self.history + n], block)
+        if n < self.block_size:
+            self._fft_in[self.history + n:self.history + self.block_size] = 0
+
+        if self._fft is not None:
+            self._fft()
+            _multiply_inplace(self._spectrum.view(np.float32), self.gain_pairs)
+            filtered = self._ifft()
+        else:
+            # scipy.fft has no out= argument, so only the transforms themselves allocate.
+            # The input frame still holds the history and must survive the forward
+            # transform; the spectrum is a temporary that irfft may reuse.
+            spectrum = rfft(self._fft_in, overwrite_x=False, workers=FFT_WORKERS)
+            _multiply_inplace(spectrum.view(np.float32), self.gain_pairs)
+            filtered = irfft(spectrum, n=self.fft_len, overwrite_x=True, workers=FFT_WORKERS)
+
+        # Keep the newest (taps - 1) samples as history for the next block. The source
+        # and destination overlap, so stage through a scratch buffer rather than let
+        # NumPy allocate a temporary.
+        np.copyto(self._tail, self._fft_in[n:n + self.history])
+        np.copyto(self._fft_in[:self.history], self._tail)
+        # Outputs before `delay` and after `delay + n` are wrapped around by the circular
+        # convolution; the ones in between are the linear-phase output for this block
+        _clip_into(filtered[self.delay:self.delay + n], out)
+
+class GpuOverlapSaveFilter(_OverlapSaveFrame):
+    """Runs the same overlap-save convolution on a CUDA device through CuPy/cuFFT."""
+    def __init__(self, taps, block_size=BLOCK_SIZE):
+        super().__init__(taps, block_size)
+        # All device work is queued on one stream; CuPy caches the cuFFT plans per length
+        self._stream = cp.cuda.Stream(non_blocking=True)
+        with self._stream:
+            self.gain_pairs = cp.asarray(self.gain_pairs)
+            self._fft_in = cp.zeros(self.fft_len, dtype=cp.float32)
+            self._tail = cp.empty(self.history, dtype=cp.float32)
+        # Pinned host staging buffers let the host<->device copies run asynchronously
+        self._host_in = cupyx.empty_pinned(block_size, dtype=np.float32)
+        self._host_out = cupyx.empty_pinned(block_size, dtype=np.float32)
+
+    def process(self, block, out):
+        """Filters one block (at most block_size samples) and writes it, clipped to full scale, into out."""
+        n = len(block)
+        np.copyto(self._host_in[:n], block)
+        with self._stream:
+            self._fft_in[self.history:self.history + n].set(self._host_in[:n], stream=self._stream)
+            if n < self.block_size:
+                self._fft_in[self.history + n:self.history + self.block_size] = 0
+
+            spectrum = cp.fft.rfft(self._fft_in)
+            gained = spectrum.view(cp.float32)
+            gained *= self.gain_pairs
+            filtered = cp.fft.irfft(spectrum, n=self.fft_len)[self.delay:self.delay + n]
+            cp.clip(filtered, -1.0, 1.0, out=filtered)
+            filtered.get(out=self._host_out[:n], stream=self._stream)
+
+            self._tail[...] = self._fft_in[n:n + self.history]
+            self._fft_in[:self.history] = self._tail
+        self._stream.synchronize()
+        np.copyto(out[:n], self._host_out[:n])
+
+class SpscRingBuffer:
+    """Lock-free single-producer/single-consumer FIFO of float32 samples.
+
+    Only the producer advances `head` and only the consumer advances `tail`, so each
+    index has a single writer and the two threads never need to share a lock.
+    """
+    def __init__(self, capacity):
+        capacity = 1 << (capacity - 1).bit_length()  # Round up to a power of two
+        self._buf = np.zeros(capacity, dtype=np.float32)
+        self._mask = capacity - 1
+        self.head = 0  # Total samples ever written
+        self.tail = 0  # Total samples ever read
+
+    def available(self):
+        return self.head - self.tail
+
+    def write(self, samples):
+        """Appends all of `samples`, or nothing (returning False) if they do not fit."""
+        n = len(samples)
+        if n > len(self._buf) - self.available():
+            return False
+        start = self.head & self._mask
+        first = min(n, len(self._buf) - start)
+        np.copyto(self._buf[start:start + first], samples[:first])
+        np.copyto(self._buf[:n - first], samples[first:])
+        self.head += n
+        return True
+
+    def read(self, out):
+        """Fills `out` completely, or leaves it untouched (returning False) if too few samples are queued."""
+        n = len(out)
+        if n > self.available():
+            return False
+        start = self.tail & self._mask
+        first = min(n, len(self._buf) - start)
+        np.copyto(out[:first], self._buf[start:start + first])
+        np.copyto(out[first:], self._buf[:n - first])
+        self.tail += n
+        return True
+
+    def skip(self, n):
+        """Discards up to `n` of the oldest queued samples (consumer side)."""
+        self.tail += min(n, self.available())
+
+class TonePlayer:
+    """Plays calibration tones through a single output stream kept open for the whole test."""
+    def __init__(self):
+        self._tone = None
+        self._pos = 0
+        self._done = threading.Event()
+        self._stream = sd.OutputStream(channels=1, samplerate=SAMPLE_RATE, dtype='float32', callback=self._callback)
+
+    def __enter__(self):
+        self._stream.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stream.close()
+
+    def _callback(self, outdata, frames, time, status):
+        tone = self._tone
+        if tone is None:
+            outdata.fill(0)
+            return
+        chunk = tone[self._pos:self._pos + frames]
+        outdata[:len(chunk), 0] = chunk
+        outdata[len(chunk):] = 0
+        self._pos += len(chunk)
+        if self._pos >= len(tone):
+            self._tone = None
+            self._done.set()
+
+    def play(self, tone):
+        """Queues a tone on the open stream and blocks until it has finished playing."""
+        self._done.clear()
+        self._pos = 0
+        self._tone = tone
+        self._done.wait()
+
 class AureliusCore:
     def __init__(self):
         self.meta_mind = MetaMind()
@@ -61,112 +399,204 @@ class AureliusCore:
         print("\n" + "="*50)
         print("      STARTING AURELIUS CALIBRATION")
         print("="*50)
-        print(self.meta_mind.guide_calibration_start())
-        input("\nPress Enter to begin the test when you are ready...")
-
-        hearing_thresholds = {}
-        for freq in HEARING_TEST_FREQUENCIES:
-            print(f"\n--- Testing Frequency: {freq} Hz ---")
-            min_audible_amplitude = None
-            # Test amplitudes from very quiet to loud (logarithmic scale)
-            for amplitude_db in range(-60, 1, 5):
-                amplitude = 10**(amplitude_db / 20.0)
-                
-                # Generate the tone
-                t = np.linspace(0, TONE_DURATION, int(SAMPLE_RATE * TONE_DURATION), False)
-                tone = np.sin(freq * t * 2 * np.pi) * amplitude
-                
-                # Play the tone
-                sd.play(tone.astype(np.float32), SAMPLE_RATE)
-                sd.wait()
+        self.meta_mind.guide_calibration_start(stream=True)
+
+        hearing_thresholds = np.zeros(len(HEARING_TEST_FREQUENCIES), dtype=np.float32)
+        # Tone buffers are allocated once and refilled for every frequency
+        base_tone = np.empty(int(SAMPLE_RATE * TONE_DURATION), dtype=np.float32)
+        tone = np.empty_like(base_tone)
+        with TonePlayer() as player:
+            input("\nPress Enter to begin the test when you are ready...")
+
+            for i, freq in enumerate(HEARING_TEST_FREQUENCIES):
+                print(f"\n--- Testing Frequency: {freq} Hz ---")
+                _generate_tone(freq, 1.0, SAMPLE_RATE, base_tone)
+
+                # Binary search for the quietest audible level. `quiet` indexes a level the
+                # user could not hear and `loud` one they could (both start just outside the
+                # scale), so about four tones give the same 5 dB precision as a full scan.
+                quiet, loud = -1, len(CALIBRATION_LEVELS_DB)
+                while loud - quiet > 1:
+                    level = (quiet + loud) // 2
+                    # Play the tone
+                    np.multiply(base_tone, CALIBRATION_AMPLITUDES[level], out=tone)
+                    player.play(tone)
+                    
+                    response = input(f"  Did you hear the tone at this level? (y/n): ").lower()
+                    if 'y' in response:
+                        loud = level
+                    else:
+                        quiet = level
                 
-                response = input(f"  Did you hear the tone at this level? (y/n): ").lower()
-                if 'y' in response:
-                    min_audible_amplitude = amplitude_db
+                if loud == len(CALIBRATION_LEVELS_DB):
+                    print("  -> Could not determine threshold for this frequency.")
+                    hearing_thresholds[i] = 0 # Assume normal hearing if no response
+                else:
+                    min_audible_amplitude = int(CALIBRATION_LEVELS_DB[loud])
                     print(f"  -> Threshold found at {min_audible_amplitude} dB.")
-                    break
-            
-            if min_audible_amplitude is None:
-                print("  -> Could not determine threshold for this frequency.")
-                hearing_thresholds[freq] = 0 # Assume normal hearing if no response
-            else:
-                hearing_thresholds[freq] = min_audible_amplitude
+                    hearing_thresholds[i] = min_audible_amplitude
         
         # --- Forge the Personal Audio Profile (The "Octave") ---
         # The profile is the inverse of the hearing loss. A -40dB loss needs a +40dB gain.
         # We cap the gain to prevent dangerously loud output.
         max_gain_db = 30.0
-        self.profile = {str(freq): max(0, min(max_gain_db, -threshold)) for freq, threshold in hearing_thresholds.items()}
-        
-        with open(PROFILE_NAME, 'w') as f:
-            json.dump(self.profile, f, indent=2)
+        # Adding 0.0 turns the -0.0 from negating a zero threshold into a plain 0.0
+        self.profile = Profile(np.array(HEARING_TEST_FREQUENCIES, dtype=np.float32),
+                               np.clip(-hearing_thresholds, 0, max_gain_db) + np.float32(0.0))
+        self.profile.to_json()
         
         print("\n" + "="*50)
         print("      CALIBRATION COMPLETE")
         print("="*50)
-        print(self.meta_mind.explain_results(self.profile))
+        self.meta_mind.explain_results(self.profile, stream=True)
 
-    def run_live_enhancement(self):
+    def run_live_enhancement(self, device='cpu'):
         """The real-time audio processing loop."""
         print("\n" + "="*50)
         print("      STARTING AURELIUS LIVE ENHANCEMENT")
         print("="*50)
-        try:
-            with open(PROFILE_NAME, 'r') as f:
-                self.profile = json.load(f)
-            print(f"  -> Successfully loaded '{PROFILE_NAME}'.")
-        except FileNotFoundError:
-            print(f"  ERROR: Could not find '{PROFILE_NAME}'. Please run 'calibrate' mode first.")
+        if device == 'gpu' and cp is None:
+            print("  ERROR: '--device gpu' requires CuPy. Install it or use '--device cpu'.")
             return
-
-        # Prepare the frequency bins and gains for the FFT
-        freqs = np.fft.rfftfreq(BLOCK_SIZE, 1/SAMPLE_RATE)
-        self.gains = np.ones_like(freqs)
+        # A profile from a calibration in this session is used as-is; otherwise load it
+        if self.profile is None:
+            try:
+                self.profile = Profile.from_json()
+                print(f"  -> Successfully loaded '{PROFILE_NAME}'.")
+            except FileNotFoundError:
+                print(f"  ERROR: Could not find '{PROFILE_NAME}'. Please run 'calibrate' mode first.")
+                return
         
-        profile_freqs = np.array(list(map(float, self.profile.keys())))
-        profile_gains_db = np.array(list(self.profile.values()))
+        # Build the desired gain curve on a dense grid. Audiogram frequencies are spaced
+        # in octaves, so interpolate in log-Hz, then smooth away the corners. Outside the
+        # tested range the nearest measured gain is held, down to DC and up to Nyquist.
+        # The grid matches the density firwin2 samples at internally.
+        grid = np.linspace(0, SAMPLE_RATE / 2, 1 + 2**int(np.ceil(np.log2(FIR_TAPS))))
+        interp_gains_db = np.interp(np.log(np.maximum(grid, 1.0)), np.log(self.profile.freqs), self.profile.gains_db)
+        interp_gains_db = gaussian_filter1d(interp_gains_db, sigma=2).astype(np.float32)
         
-        # Interpolate the gains across the entire frequency spectrum
-        interp_gains_db = np.interp(freqs, profile_freqs, profile_gains_db)
-        # Convert dB to linear amplitude
-        self.gains = 10**(interp_gains_db / 20.0)
+        # Design a linear-phase FIR filter that follows the curve
+        taps = firwin2(FIR_TAPS, grid, 10**(interp_gains_db / 20.0), fs=SAMPLE_RATE)
+        self.filter = GpuOverlapSaveFilter(taps) if device == 'gpu' else OverlapSaveFilter(taps)
+        print(f"  -> Filtering on the {device.upper()}.")
 
-        print("  -> Live enhancement is active. Press Ctrl+C to stop.")
+        _warm_up_kernels()
+
+        # The PortAudio callback only moves samples in and out of these rings; all DSP
+        # happens on a separate thread so Python hiccups there cannot stall the device.
+        capture = SpscRingBuffer(RING_BLOCKS * BLOCK_SIZE)
+        playback = SpscRingBuffer(RING_BLOCKS * BLOCK_SIZE)
+        # One block of silence gives the worker a full callback period to catch up
+        playback.write(np.zeros(BLOCK_SIZE, dtype=np.float32))
+        data_ready = threading.Event()
+        stop = threading.Event()
+        host_frames = BLOCK_SIZE
+        dropped_input = 0
+        worker_error = None
+
+        def dsp_worker():
+            nonlocal worker_error
+            block = np.empty(BLOCK_SIZE, dtype=np.float32)
+            processed_block = np.empty(BLOCK_SIZE, dtype=np.float32)
+            try:
+                while not stop.is_set():
+                    data_ready.wait(timeout=0.1)
+                    data_ready.clear()
+                    while capture.read(block):
+                        # Apply the personalized gain profile as a streaming FIR filter,
+                        # limited to full scale so the earbuds never clip
+                        self.filter.process(block, processed_block)
+                        playback.write(processed_block)
+            except Exception as e:
+                # Without the worker the stream would only ever play silence
+                worker_error = e
+                stop.set()
 
         def audio_callback(indata, outdata, frames, time, status):
+            nonlocal host_frames, dropped_input
             if status:
                 print(status)
-            
-            # 1. Convert microphone audio to frequency domain
-            fft_data = rfft(indata[:, 0])
-            
-            # 2. Apply the personalized gain profile
-            fft_data *= self.gains
-            
-            # 3. Convert back to audio domain
-            processed_audio = irfft(fft_data)
-            
-            # 4. Send to earbuds, ensuring no clipping
-            outdata[:, 0] = np.clip(processed_audio, -1.0, 1.0)
-
-        with sd.Stream(channels=1, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, callback=audio_callback):
-            while True:
-                sd.sleep(1000)
+            # Some PortAudio hosts ignore the requested blocksize. The rings absorb any
+            # block length and the worker still filters whole BLOCK_SIZE blocks.
+            host_frames = frames
+            # RawStream hands over plain buffers. PortAudio may pass a different pointer
+            # on every call, so wrap them here: frombuffer neither copies nor reshapes.
+            if not capture.write(np.frombuffer(indata, dtype=np.float32, count=frames)):
+                dropped_input += frames
+            data_ready.set()
+            # Play silence rather than stale audio if the worker has fallen behind
+            out = np.frombuffer(outdata, dtype=np.float32, count=frames)
+            if not playback.read(out):
+                out.fill(0)
+            # Samples queued in both rings are the live latency. The worker only moves
+            # samples from one ring to the other, so this only grows when an underrun
+            # leaves late audio queued. Drop that excess so the latency returns to its
+            # target instead of growing for good. The target is one block when the host
+            # delivers whole blocks; otherwise playback must also cover the samples still
+            # waiting in capture for a block to fill up.
+            # Playback is read first: a block moved in between is then undercounted,
+            # never counted twice.
+            target = frames + BLOCK_SIZE - math.gcd(frames, BLOCK_SIZE)
+            queued = playback.available()
+            queued += capture.available()
+            if queued > target:
+                playback.skip(queued - target)
+
+        worker = threading.Thread(target=dsp_worker, daemon=True)
+        worker.start()
+        print("  -> Live enhancement is active. Press Ctrl+C to stop.")
+        try:
+            with sd.RawStream(channels=1, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, dtype='float32', callback=audio_callback):
+                reported_input = 0
+                warned_frames = False
+                while not stop.is_set():
+                    if host_frames != BLOCK_SIZE and not warned_frames:
+                        warned_frames = True
+                        print(f"  -> Note: the audio device delivers {host_frames}-sample blocks, not {BLOCK_SIZE}; buffering to match.")
+                    if dropped_input != reported_input:
+                        print(f"  -> Warning: processing fell behind; dropped {dropped_input - reported_input} input samples.")
+                        reported_input = dropped_input
+                    sd.sleep(1000)
+        finally:
+            stop.set()
+            worker.join()
+        if worker_error is not None:
+            raise worker_error
+
+def build_native_dsp():
+    """Compiles _aurelius_dsp.pyx next to this script so later runs import it directly."""
+    from pyximport import pyximport
+    # install() only sets up pyximport's build options here; the module is built from its
+    # .pyx path rather than imported. The import at the top of this script may already have
+    # loaded an older module, and importing again would just return it. build_module also
+    # rebuilds when a file listed in _aurelius_dsp.pyxdep has changed.
+    pyx_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_aurelius_dsp.pyx')
+    try:
+        pyximport.install(inplace=True, language_level=3)
+        so_path = pyximport.build_module('_aurelius_dsp', pyx_path, inplace=True, language_level=3)
+    except Exception as e:
+        print(f"  ERROR: Could not build the native DSP module (needs Cython and libfftw3f): {e}")
+        return
+    print(f"  -> Built '{os.path.basename(so_path)}'. Live enhancement will use it from now on.")
 
 # --- 4. MAIN EXECUTION BLOCK ---
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Project Aurelius: A Sovereign AI Hearing Personalization Platform.")
-    parser.add_argument('mode', choices=['calibrate', 'run'], help="Choose 'calibrate' to create your profile, or 'run' to start live enhancement.")
+    parser.add_argument('mode', choices=['calibrate', 'run', 'build'], help="Choose 'calibrate' to create your profile, 'run' to start live enhancement, or 'build' to compile the optional native DSP module.")
+    parser.add_argument('--device', choices=['cpu', 'gpu'], default='cpu', help="Where 'run' mode filters audio. 'gpu' requires CuPy and a CUDA device.")
     args = parser.parse_args()
 
-    aurelius_agi = AureliusCore()
+    if args.mode == 'build':
+        build_native_dsp()
+    else:
+        aurelius_agi = AureliusCore()
 
-    if args.mode == 'calibrate':
-        aurelius_agi.run_calibration()
-    elif args.mode == 'run':
-        try:
-            aurelius_agi.run_live_enhancement()
-        except KeyboardInterrupt:
-            print("\n  -> Live enhancement stopped by user.")
-        except Exception as e:
-            print(f"\nAn error occurred during live enhancement: {e}")
\ No newline at end of file
+        if args.mode == 'calibrate':
+            aurelius_agi.run_calibration()
+        elif args.mode == 'run':
+            try:
+                aurelius_agi.run_live_enhancement(args.device)
+            except KeyboardInterrupt:
+                print("\n  -> Live enhancement stopped by user.")
+            except Exception as e:
+                print(f"\nAn error occurred during live enhancement: {e}")
\ No newline at end of file